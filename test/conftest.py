@@ -0,0 +1,76 @@
+import os
+
+import pytest
+import torch
+from tokenizers import ByteLevelBPETokenizer
+from transformers import BartConfig, BartForSequenceClassification, BartTokenizer
+
+from validator import RestrictToTopic
+
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+_CORPUS = [
+    "This example has to do with topic sports music politics cooking.",
+    "The Chiefs won the Super Bowl. The band played a new song.",
+]
+
+
+@pytest.fixture(scope="session")
+def tiny_model(tmp_path_factory) -> str:
+    """A randomly initialized BART NLI model small enough to build for each test
+    session, so the zero-shot path can run without downloading a checkpoint."""
+    path = str(tmp_path_factory.mktemp("tiny-bart-mnli"))
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        _CORPUS,
+        vocab_size=300,
+        min_frequency=1,
+        special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"],
+    )
+    bpe.save_model(path)
+    tokenizer = BartTokenizer(
+        os.path.join(path, "vocab.json"), os.path.join(path, "merges.txt")
+    )
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=16,
+        encoder_layers=1,
+        decoder_layers=1,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=32,
+        decoder_ffn_dim=32,
+        max_position_embeddings=128,
+        num_labels=3,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+    )
+    BartForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+@pytest.fixture
+def make_validator(tiny_model):
+    """Builds validators on the tiny model that only ask the LLM, with sports as
+    the valid topic and music as the invalid one. Keyword arguments override
+    those defaults."""
+
+    def make(llm_callable="gpt-4o", **kwargs):
+        options = {
+            "valid_topics": ["sports"],
+            "invalid_topics": ["music"],
+            "model": tiny_model,
+            "disable_classifier": True,
+            **kwargs,
+        }
+        return RestrictToTopic(llm_callable=llm_callable, **options)
+
+    return make
@@ -0,0 +1,48 @@
+import contextvars
+import threading
+
+import pytest
+from guardrails.stores.context import set_context_var
+
+
+@pytest.fixture
+def validator(make_validator, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return make_validator("gpt-4o")
+
+
+def _client_args_with_kwargs(validator, kwargs):
+    """Sets the guardrails call kwargs in a fresh context, as guardrails does for
+    each call, and returns the client args the validator reads from it."""
+
+    def run():
+        set_context_var("kwargs", kwargs)
+        return validator.get_client_args()
+
+    return contextvars.Context().run(run)
+
+
+def test_client_args_come_from_call_kwargs(validator):
+    args = _client_args_with_kwargs(
+        validator, {"api_key": "key-a", "api_base": "https://a"}
+    )
+
+    assert args == ("key-a", "https://a")
+
+
+def test_client_args_follow_kwargs_created_in_other_threads(validator):
+    results = {}
+
+    def run(name):
+        results[name] = _client_args_with_kwargs(validator, {"api_key": name})
+
+    for name in ("key-a", "key-b"):
+        thread = threading.Thread(target=run, args=(name,))
+        thread.start()
+        thread.join()
+
+    assert results == {"key-a": ("key-a", None), "key-b": ("key-b", None)}
+
+
+def test_no_call_kwargs(validator):
+    assert contextvars.Context().run(validator.get_client_args) == (None, None)
@@ -0,0 +1,96 @@
+import asyncio
+
+import orjson
+import pytest
+
+from validator.main import _parse_llm_batch_response
+
+
+def _content(results):
+    return orjson.dumps({"results": results}).decode()
+
+
+def test_parse_batch_response_orders_results_by_idx():
+    content = _content(
+        [
+            {"idx": 1, "topics_present": ["music"]},
+            {"idx": 0, "topics_present": ["sports"]},
+        ]
+    )
+
+    assert _parse_llm_batch_response(content, 2) == [["sports"], ["music"]]
+
+
+def test_parse_batch_response_accepts_string_idx():
+    content = _content([{"idx": "0", "topics_present": ["sports"]}])
+
+    assert _parse_llm_batch_response(content, 1) == [["sports"]]
+
+
+def test_parse_batch_response_skips_invalid_results():
+    content = _content(
+        [
+            {"idx": [0], "topics_present": ["music"]},
+            {"idx": "first", "topics_present": ["music"]},
+            {"topics_present": ["music"]},
+            "sports",
+            {"idx": 1},
+            {"idx": 2, "topics_present": "music"},
+            {"idx": 3, "topics_present": []},
+            {"idx": 7, "topics_present": ["music"]},
+        ]
+    )
+
+    assert _parse_llm_batch_response(content, 4) == [None, None, None, []]
+
+
+@pytest.mark.parametrize(
+    "content", ['["sports"]', '{"results": {"idx": 0}}', "{}", '"results"']
+)
+def test_parse_batch_response_treats_malformed_answers_as_missing(content):
+    assert _parse_llm_batch_response(content, 2) == [None, None]
+
+
+@pytest.fixture
+def validator(make_validator):
+    return make_validator("gpt-4o", llm_batch_size=2)
+
+
+def test_validate_many_sends_missing_texts_on_their_own(validator):
+    batches, single_texts = [], []
+
+    async def call_batch(texts, topics):
+        batches.append(texts)
+        # The LLM leaves out the last text of each batch
+        return [["sports"]] * (len(texts) - 1) + [None]
+
+    async def call(text, topics):
+        single_texts.append(text)
+        return ["music"]
+
+    validator._llms[0].call_batch_async = call_batch
+    validator._llms[0].call_async = call
+
+    results = asyncio.run(validator.validate_many(["a", "b", "c"]))
+
+    assert [result.outcome for result in results] == ["pass", "fail", "fail"]
+    assert sorted(map(tuple, batches)) == [("a", "b"), ("c",)]
+    assert sorted(single_texts) == ["b", "c"]
+
+
+def test_validate_many_matches_validate(validator):
+    async def call_batch(texts, topics):
+        return [["sports"] if "win" in text else ["music"] for text in texts]
+
+    def call(text, topics):
+        return ["sports"] if "win" in text else ["music"]
+
+    validator._llms[0].call_batch_async = call_batch
+    validator._llms[0].call = call
+    texts = ["we win", "a song", "they win", "another song", "win"]
+
+    results = asyncio.run(validator.validate_many(texts))
+
+    assert [result.outcome for result in results] == [
+        validator.validate(text).outcome for text in texts
+    ]
@@ -0,0 +1,102 @@
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from validator.main import _LLMResponseCache
+
+
+def _timing_out_call(text, topics):
+    # Timeouts move on to the next LLM without retrying
+    raise APITimeoutError(request=httpx.Request("POST", "https://api.openai.com"))
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm-cache.sqlite")
+
+
+def test_cache_persists_across_instances(cache_path):
+    key = _LLMResponseCache.key("text", ["sports", "music"], "gpt-4o")
+    _LLMResponseCache(cache_path).set(key, ["sports"])
+
+    assert _LLMResponseCache(cache_path).get(key) == ["sports"]
+
+
+def test_cache_keys_differ_by_text_topics_and_llm():
+    keys = {
+        _LLMResponseCache.key("text", ["sports"], "gpt-4o"),
+        _LLMResponseCache.key("text2", ["sports"], "gpt-4o"),
+        _LLMResponseCache.key("text", ["music"], "gpt-4o"),
+        _LLMResponseCache.key("text", ["sports"], "gpt-4"),
+        # Parts are separated, so moving characters between them changes the key
+        _LLMResponseCache.key("tex", ["tsports"], "gpt-4o"),
+    }
+
+    assert len(keys) == 5
+
+
+def test_openai_responses_are_shared_through_the_cache(make_validator, cache_path):
+    calls = []
+
+    def fake_call(text, topics):
+        calls.append(text)
+        return ["sports"]
+
+    first, second = (
+        make_validator("gpt-4o", llm_cache_path=cache_path),
+        make_validator("gpt-4o", llm_cache_path=cache_path),
+    )
+    first._llms[0].call = fake_call
+    second._llms[0].call = fake_call
+
+    assert first.validate("same text").outcome == "pass"
+    assert second.validate("same text").outcome == "pass"
+    assert calls == ["same text"]
+
+
+def test_custom_callables_are_not_cached(make_validator, cache_path):
+    sports = make_validator(
+        lambda text, topics: ["sports"], llm_cache_path=cache_path
+    )
+    music = make_validator(lambda text, topics: ["music"], llm_cache_path=cache_path)
+
+    assert sports.validate("same text").outcome == "pass"
+    assert music.validate("same text").outcome == "fail"
+
+
+def test_fallback_answers_are_not_cached_for_the_primary(make_validator, cache_path):
+    primary_calls = []
+
+    def healthy_call(text, topics):
+        primary_calls.append(text)
+        return ["sports"]
+
+    degraded = make_validator(
+        "gpt-4o",
+        llm_fallbacks=[lambda text, topics: ["music"]],
+        llm_cache_path=cache_path,
+    )
+    degraded._llms[0].call = _timing_out_call
+    healthy = make_validator("gpt-4o", llm_cache_path=cache_path)
+    healthy._llms[0].call = healthy_call
+
+    assert degraded.validate("same text").outcome == "fail"
+    assert healthy.validate("same text").outcome == "pass"
+    assert primary_calls == ["same text"]
+
+
+def test_openai_fallback_answers_are_cached_under_the_fallback(
+    make_validator, cache_path
+):
+    validator = make_validator(
+        "gpt-4o", llm_fallbacks=["gpt-4"], llm_cache_path=cache_path
+    )
+    validator._llms[0].call = _timing_out_call
+    validator._llms[1].call = lambda text, topics: ["music"]
+
+    assert validator.validate("same text").outcome == "fail"
+
+    cache = _LLMResponseCache(cache_path)
+    topics = validator._all_topics
+    assert cache.get(_LLMResponseCache.key("same text", topics, "gpt-4")) == ["music"]
+    assert cache.get(_LLMResponseCache.key("same text", topics, "gpt-4o")) is None
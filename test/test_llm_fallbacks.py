@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import APITimeoutError, InternalServerError, RateLimitError
+from tenacity import wait_none
+
+from validator import main
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(error_class, status_code):
+    response = httpx.Response(status_code, request=_REQUEST)
+    return error_class("error", response=response, body=None)
+
+
+@pytest.fixture(autouse=True)
+def _no_retry_wait(monkeypatch):
+    monkeypatch.setattr(main, "wait_random_exponential", lambda **kwargs: wait_none())
+
+
+class FlakyLLM:
+    """LLM callable raising the given errors before answering `topics`."""
+
+    def __init__(self, errors, topics=("sports",)):
+        self.errors = list(errors)
+        self.topics = list(topics)
+        self.calls = 0
+
+    def __call__(self, text, candidate_topics):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.topics
+
+
+@pytest.mark.parametrize(
+    "error",
+    [_status_error(InternalServerError, 500), APITimeoutError(request=_REQUEST)],
+)
+def test_single_llm_retries_every_error(make_validator, error):
+    llm = FlakyLLM([error] * 4)
+
+    assert make_validator(llm).validate("text").outcome == "pass"
+    assert llm.calls == 5
+
+
+def test_last_llm_raises_after_retries(make_validator):
+    llm = FlakyLLM([_status_error(InternalServerError, 500)] * 5)
+
+    with pytest.raises(InternalServerError):
+        make_validator(llm).validate("text")
+    assert llm.calls == 5
+
+
+def test_timeout_falls_back_without_retrying(make_validator):
+    primary = FlakyLLM([APITimeoutError(request=_REQUEST)], topics=["music"])
+    fallback = FlakyLLM([])
+
+    validator = make_validator(primary, llm_fallbacks=[fallback])
+
+    assert validator.validate("text").outcome == "pass"
+    assert primary.calls == 1
+    assert fallback.calls == 1
+
+
+def test_rate_limit_retries_before_falling_back(make_validator):
+    primary = FlakyLLM([_status_error(RateLimitError, 429)] * 2)
+    fallback = FlakyLLM([], topics=["music"])
+
+    validator = make_validator(primary, llm_fallbacks=[fallback])
+
+    assert validator.validate("text").outcome == "pass"
+    assert primary.calls == 3
+    assert fallback.calls == 0
+
+
+def test_async_chain_falls_back(make_validator):
+    primary = FlakyLLM(
+        [_status_error(InternalServerError, 500)] * 2, topics=["music"]
+    )
+    fallback = FlakyLLM([])
+
+    validator = make_validator(primary, llm_fallbacks=[fallback])
+    results = asyncio.run(validator.validate_many(["a", "b"]))
+
+    assert [result.outcome for result in results] == ["pass", "pass"]
+    assert primary.calls == 2
+    assert fallback.calls == 2
+
+
+def test_failed_batch_falls_back_once(make_validator):
+    batch_calls = []
+
+    async def failing_batch(texts, topics):
+        batch_calls.append(texts)
+        raise _status_error(InternalServerError, 500)
+
+    fallback = FlakyLLM([])
+    validator = make_validator("gpt-4o", llm_fallbacks=[fallback], llm_batch_size=2)
+    validator._llms[0].call_batch_async = failing_batch
+
+    results = asyncio.run(validator.validate_many(["a", "b", "c"]))
+
+    assert [result.outcome for result in results] == ["pass"] * 3
+    # The batch LLM is not asked again about each text
+    assert sorted(map(tuple, batch_calls)) == [("a", "b"), ("c",)]
+    assert fallback.calls == 3
+
+
+def test_failed_batch_of_last_llm_raises(make_validator):
+    async def failing_batch(texts, topics):
+        raise _status_error(InternalServerError, 500)
+
+    validator = make_validator("gpt-4o", llm_batch_size=2)
+    validator._llms[0].call_batch_async = failing_batch
+
+    with pytest.raises(InternalServerError):
+        asyncio.run(validator.validate_many(["a", "b"]))
@@ -0,0 +1,11 @@
+def test_llm_topics_outside_candidates_are_dropped(make_validator):
+    validator = make_validator(lambda text, topics: ["sports", "cooking"])
+
+    assert validator.get_topics_llm("text", ["sports", "music"]) == ["sports"]
+
+
+def test_non_string_llm_topics_are_skipped(make_validator):
+    validator = make_validator(lambda text, topics: [{"topic": "sports"}, ["music"]])
+
+    assert validator.get_topics_llm("text", ["sports", "music"]) == []
+    assert validator.validate("text").outcome == "fail"
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from validator import main
+
+_clients = []
+
+
+class FakeAsyncOpenAI:
+    """Stands in for AsyncOpenAI, answering every text with the sports topic."""
+
+    def __init__(self, api_key=None, base_url=None):
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        _clients.append(self)
+
+    async def _create(self, model, response_format, messages):
+        assert not self.closed
+        prompt = messages[0]["content"]
+        if "results" in prompt:
+            num_texts = prompt.count('"\n') + 1
+            content = {
+                "results": [
+                    {"idx": idx, "topics_present": ["sports"]}
+                    for idx in range(num_texts)
+                ]
+            }
+        else:
+            content = {"topics_present": ["sports"]}
+        message = SimpleNamespace(content=json.dumps(content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+@pytest.fixture(autouse=True)
+def fake_openai(monkeypatch):
+    _clients.clear()
+    monkeypatch.setattr(main, "AsyncOpenAI", FakeAsyncOpenAI)
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+
+
+@pytest.mark.parametrize("llm_batch_size", [1, 2])
+def test_validate_many_shares_and_closes_one_client(make_validator, llm_batch_size):
+    validator = make_validator(llm_batch_size=llm_batch_size)
+
+    results = asyncio.run(validator.validate_many(["a", "b", "c"]))
+
+    assert [result.outcome for result in results] == ["pass"] * 3
+    assert len(_clients) == 1
+    assert _clients[0].closed
+
+
+def test_client_is_closed_after_a_request(make_validator):
+    validator = make_validator()
+
+    topics = asyncio.run(validator.get_topics_llm_async("a", ["sports"]))
+
+    assert topics == ["sports"]
+    assert [client.closed for client in _clients] == [True]
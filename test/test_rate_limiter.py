@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from validator import main
+from validator.main import _RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(autouse=True)
+def _clear_rate_limiters(monkeypatch):
+    monkeypatch.setattr(main, "_RATE_LIMITERS", {})
+
+
+def test_waits_for_request_capacity(clock):
+    limiter = _RateLimiter(max_requests_per_minute=2, max_tokens_per_minute=None)
+
+    assert limiter._consume(10) == 0
+    assert limiter._consume(10) == 0
+    assert limiter._consume(10) == pytest.approx(30)
+
+    clock[0] += 30
+    assert limiter._consume(10) == 0
+
+
+def test_waits_for_token_capacity(clock):
+    limiter = _RateLimiter(max_requests_per_minute=None, max_tokens_per_minute=600)
+
+    assert limiter._consume(500) == 0
+    assert limiter._consume(200) == pytest.approx(10)
+
+    clock[0] += 10
+    assert limiter._consume(200) == 0
+
+
+def test_request_larger_than_bucket_waits_for_full_bucket(clock):
+    limiter = _RateLimiter(max_requests_per_minute=None, max_tokens_per_minute=600)
+
+    assert limiter._consume(100) == 0
+    assert limiter._consume(5000) == pytest.approx(10)
+
+
+def test_no_limits_by_default(make_validator):
+    validator = make_validator("gpt-4o")
+
+    assert validator._get_rate_limiter(validator._llms[0]) is None
+
+
+def test_custom_callables_are_not_throttled(make_validator):
+    validator = make_validator(
+        lambda text, topics: ["sports"], llm_max_requests_per_minute=1
+    )
+
+    start = time.monotonic()
+    for _ in range(100):
+        assert validator.validate("The Chiefs won.").outcome == "pass"
+    assert time.monotonic() - start < 5
+
+
+def test_validators_share_limiter_per_key_and_model(make_validator, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "key-a")
+    first, second, other_model = (
+        make_validator("gpt-4o", llm_max_requests_per_minute=60),
+        make_validator("gpt-4o", llm_max_requests_per_minute=60),
+        make_validator("gpt-4", llm_max_requests_per_minute=60),
+    )
+    limiter = first._get_rate_limiter(first._llms[0])
+
+    assert limiter is not None
+    assert second._get_rate_limiter(second._llms[0]) is limiter
+    assert other_model._get_rate_limiter(other_model._llms[0]) is not limiter
+
+    monkeypatch.setenv("OPENAI_API_KEY", "key-b")
+    assert first._get_rate_limiter(first._llms[0]) is not limiter
+
+
+def test_validators_with_other_limits_get_their_own_limiter(make_validator):
+    slow, fast = (
+        make_validator("gpt-4o", llm_max_requests_per_minute=60),
+        make_validator("gpt-4o", llm_max_requests_per_minute=600),
+    )
+    slow_limiter = slow._get_rate_limiter(slow._llms[0])
+    fast_limiter = fast._get_rate_limiter(fast._llms[0])
+
+    assert slow_limiter is not fast_limiter
+    assert slow_limiter is not None and slow_limiter.max_requests_per_minute == 60
+    assert fast_limiter is not None and fast_limiter.max_requests_per_minute == 600
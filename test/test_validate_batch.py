@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from validator import RestrictToTopic
+
+TEXTS = [
+    "The Chiefs won the Super Bowl.",
+    "The band played a new song.",
+    "This example has to do with cooking and politics and sports.",
+    "",
+]
+
+
+def _llm(text, topics):
+    return ["sports"] if "Chiefs" in text else ["music"]
+
+
+def _summary(result):
+    return result.outcome, getattr(result, "error_message", None)
+
+
+@pytest.mark.parametrize("disable_llm", [False, True])
+@pytest.mark.parametrize("zero_shot_threshold", [0.3, 0.5, 0.7])
+def test_batch_validation_matches_validate(
+    tiny_model, disable_llm, zero_shot_threshold
+):
+    validator = RestrictToTopic(
+        valid_topics=["sports", "cooking"],
+        invalid_topics=["music", "politics"],
+        model=tiny_model,
+        llm_callable=_llm,
+        disable_llm=disable_llm,
+        zero_shot_threshold=zero_shot_threshold,
+        high_confidence_threshold=0.6,
+    )
+    expected = [_summary(validator.validate(text)) for text in TEXTS]
+
+    assert [_summary(r) for r in validator.validate_batch(TEXTS)] == expected
+    assert [
+        _summary(r) for r in asyncio.run(validator.validate_many(TEXTS))
+    ] == expected
+
+
+def test_batch_validation_needs_a_classifier_or_llm(tiny_model):
+    validator = RestrictToTopic(
+        valid_topics=["sports"],
+        model=tiny_model,
+        disable_classifier=True,
+        disable_llm=True,
+    )
+
+    with pytest.raises(ValueError):
+        validator.validate_batch(TEXTS)
+    with pytest.raises(ValueError):
+        asyncio.run(validator.validate_many(TEXTS))
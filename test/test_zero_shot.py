@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from transformers import pipeline
+
+from validator import RestrictToTopic
+from validator.main import _HYPOTHESIS_TEMPLATE, _get_pipeline
+
+TEXTS = [
+    "The Chiefs won the Super Bowl.",
+    "The band played a new song.",
+    "This example has to do with cooking and politics and sports.",
+]
+TOPICS = ["sports", "music", "politics"]
+
+
+def _stock_scores(model: str) -> np.ndarray:
+    classifier = pipeline("zero-shot-classification", model=model)
+    scores = []
+    for text in TEXTS:
+        result = classifier(
+            text, TOPICS, hypothesis_template=_HYPOTHESIS_TEMPLATE, multi_label=True
+        )
+        by_label = dict(zip(result["labels"], result["scores"]))
+        scores.append([by_label[topic] for topic in TOPICS])
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 9])
+def test_margins_match_pipeline_scores(tiny_model, batch_size):
+    margins = _get_pipeline(tiny_model, -1).entailment_margins(
+        TEXTS, TOPICS, _HYPOTHESIS_TEMPLATE, batch_size=batch_size
+    )
+
+    assert margins.shape == (len(TEXTS), len(TOPICS))
+    np.testing.assert_allclose(
+        1 / (1 + np.exp(-margins)), _stock_scores(tiny_model), atol=1e-6
+    )
+
+
+def test_zero_shot_topics_match_thresholded_scores(tiny_model):
+    scores = _stock_scores(tiny_model)
+    # Halfway between two scores, so no score sits on the threshold
+    ordered = np.sort(scores, axis=None)
+    threshold = float(ordered[len(ordered) // 2 - 1 : len(ordered) // 2 + 1].mean())
+    validator = RestrictToTopic(
+        valid_topics=TOPICS[:2],
+        invalid_topics=TOPICS[2:],
+        model=tiny_model,
+        disable_llm=True,
+        zero_shot_threshold=threshold,
+    )
+
+    found, _ = validator._get_topics_zero_shot(TEXTS, TOPICS)
+
+    for text_topics, text_scores in zip(found, scores):
+        expected = {t for t, s in zip(TOPICS, text_scores) if s > threshold}
+        assert set(text_topics) == expected
+
+
+def _ranked_topics(tiny_model):
+    """The first two topics ordered by their score on the first text, with the
+    scores."""
+    margins = _get_pipeline(tiny_model, -1).entailment_margins(
+        TEXTS[:1], TOPICS[:2], _HYPOTHESIS_TEMPLATE, batch_size=2
+    )
+    scores = 1 / (1 + np.exp(-margins[0]))
+    return sorted(zip(TOPICS[:2], scores.tolist()), key=lambda item: -item[1])
+
+
+def _ensemble_validator(tiny_model, valid, invalid, calls, **kwargs):
+    def llm(text, topics):
+        calls.append(text)
+        return [valid]
+
+    return RestrictToTopic(
+        valid_topics=[valid],
+        invalid_topics=[invalid],
+        model=tiny_model,
+        llm_callable=llm,
+        **kwargs,
+    )
+
+
+def test_llm_skipped_when_valid_topic_is_confident(tiny_model):
+    (valid, valid_score), (invalid, invalid_score) = _ranked_topics(tiny_model)
+    # Halfway between the two scores, so only the valid topic clears it
+    threshold = (valid_score + invalid_score) / 2
+    calls = []
+    validator = _ensemble_validator(
+        tiny_model,
+        valid,
+        invalid,
+        calls,
+        zero_shot_threshold=threshold,
+        high_confidence_threshold=threshold,
+    )
+
+    assert validator.validate(TEXTS[0]).outcome == "pass"
+    assert calls == []
+
+
+def test_llm_called_when_invalid_topic_is_also_found(tiny_model):
+    (valid, valid_score), (invalid, invalid_score) = _ranked_topics(tiny_model)
+    calls = []
+    validator = _ensemble_validator(
+        tiny_model,
+        valid,
+        invalid,
+        calls,
+        zero_shot_threshold=invalid_score / 2,
+        high_confidence_threshold=(valid_score + invalid_score) / 2,
+    )
+
+    assert validator.validate(TEXTS[0]).outcome == "fail"
+    assert calls == [TEXTS[0]]
@@ -1,8 +1,37 @@
+import asyncio
+import contextlib
 import contextvars
+import functools
+import hashlib
+import inspect
 import json
+import logging
+import math
 import os
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
+import numpy as np
+import orjson
+import tiktoken
+import torch
 from dotenv import load_dotenv
 from guardrails.validator_base import (
     ErrorSpan,
@@ -12,9 +41,500 @@ from guardrails.validator_base import (
     Validator,
     register_validator,
 )
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_random_exponential
-from transformers import pipeline
+from huggingface_hub.constants import HF_HOME
+from openai import (
+    APIConnectionError,
+    APIError,
+    APITimeoutError,
+    AsyncOpenAI,
+    OpenAI,
+    RateLimitError,
+)
+from openai.types.chat import ChatCompletionMessageParam
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from transformers import (
+    AutoTokenizer,
+    PreTrainedModel,
+    ZeroShotClassificationPipeline,
+    pipeline,
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_PIPELINE_LOCK = threading.Lock()
+
+_HYPOTHESIS_TEMPLATE = "This example has to do with topic {}."
+
+# Rough allowance for the prompt template and the completion of an LLM request
+_LLM_REQUEST_TOKEN_OVERHEAD = 200
+
+# LLM requests validate_many keeps in flight when no request rate is given
+_DEFAULT_LLM_CONCURRENCY = 8
+
+# Default of ContextVar.get telling an unset variable apart from any value
+_MISSING = object()
+
+
+class _TopicClassificationPipeline(ZeroShotClassificationPipeline):
+    """Zero-shot pipeline that scores every text/topic pair of a call in padded
+    batches, instead of running the pipeline's per-pair preprocessing."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._forward_kwargs = (
+            {"use_cache": False}
+            if "use_cache" in inspect.signature(self.model.forward).parameters
+            else {}
+        )
+
+    def entailment_margins(
+        self,
+        texts: List[str],
+        candidate_labels: List[str],
+        hypothesis_template: str,
+        batch_size: int,
+    ) -> np.ndarray:
+        """Returns the entailment logit minus the contradiction logit of each text
+        and label, with shape (len(texts), len(candidate_labels)).
+
+        With `multi_label=True` the pipeline score of a label is the sigmoid of this
+        margin, so thresholding the margin against the logit of a score threshold
+        gives the same labels without the pipeline's postprocessing."""
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            raise ValueError("The zero-shot pipeline needs a tokenizer")
+        entailment_id = self.entailment_id
+        contradiction_id = -1 if entailment_id == 0 else 0
+        premises = [text for text in texts for _ in candidate_labels]
+        hypotheses = [
+            hypothesis_template.format(candidate_label)
+            for candidate_label in candidate_labels
+        ] * len(texts)
+
+        margins = []
+        for start in range(0, len(premises), batch_size):
+            batch = tokenizer(
+                premises[start : start + batch_size],
+                hypotheses[start : start + batch_size],
+                truncation="only_first",
+                padding=True,
+                return_tensors="pt",
+            )
+            batch = {name: tensor.to(self.device) for name, tensor in batch.items()}
+            with torch.inference_mode():
+                logits = self.model(**batch, **self._forward_kwargs).logits.float()
+            margins.append(
+                (logits[:, entailment_id] - logits[:, contradiction_id]).cpu().numpy()
+            )
+        return np.concatenate(margins).reshape(len(texts), len(candidate_labels))
+
+
+def _is_cuda_device(device: Union[str, int]) -> bool:
+    return isinstance(device, int) and device >= 0
+
+
+def _load_quantized_model(model: str):
+    """Exports `model` to ONNX and applies dynamic int8 quantization to its linear
+    layers. The quantized model is stored in the Hugging Face cache of the user and
+    reused by later processes."""
+    try:
+        from optimum.onnxruntime import (  # pyright: ignore[reportMissingImports]
+            ORTModelForSequenceClassification,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import (  # pyright: ignore[reportMissingImports]
+            AutoQuantizationConfig,
+        )
+    except ImportError as e:
+        raise ImportError(
+            "quantize=True requires optimum with onnxruntime. "
+            "Install it with `pip install optimum[onnxruntime]`."
+        ) from e
+
+    cache_dir = os.path.join(HF_HOME, "restricttotopic")
+    save_dir = os.path.join(cache_dir, model.replace("/", "--") + "-int8")
+    file_name = "model_quantized.onnx"
+    if not os.path.isdir(save_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Export next to the final directory and move it into place once complete,
+        # so a concurrent process never loads a partially written model
+        export_dir = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            ort_model = ORTModelForSequenceClassification.from_pretrained(
+                model, export=True
+            )
+            quantizer = ORTQuantizer.from_pretrained(ort_model)
+            quantization_config = AutoQuantizationConfig.avx512_vnni(
+                is_static=False, per_channel=True
+            )
+            quantizer.quantize(
+                save_dir=export_dir, quantization_config=quantization_config
+            )
+            os.rename(export_dir, save_dir)
+        except OSError:
+            # Another process moved its export into place first
+            if not os.path.isdir(save_dir):
+                raise
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+    return ORTModelForSequenceClassification.from_pretrained(
+        save_dir, file_name=file_name
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pipeline(
+    model: str,
+    device: Union[str, int],
+    quantize: bool,
+    compile_model: bool,
+    half_precision: bool,
+) -> _TopicClassificationPipeline:
+    pipeline_kwargs = {}
+    onnx = False
+    if quantize and device in (-1, "cpu"):
+        pipeline_kwargs["tokenizer"] = AutoTokenizer.from_pretrained(model)
+        model = _load_quantized_model(model)
+        onnx = True
+
+    classifier = cast(
+        _TopicClassificationPipeline,
+        pipeline(
+            "zero-shot-classification",
+            model=model,
+            device=device,
+            hypothesis_template=_HYPOTHESIS_TEMPLATE,
+            multi_label=True,
+            pipeline_class=_TopicClassificationPipeline,
+            **pipeline_kwargs,
+        ),
+    )
+
+    if half_precision and _is_cuda_device(device):
+        # bfloat16 needs Ampere or newer, older GPUs get float16 tensor cores
+        major, _ = torch.cuda.get_device_capability(device)
+        if major >= 8:
+            classifier.model.bfloat16()
+        else:
+            classifier.model.half()
+
+    # ONNX Runtime models are already fused, and mps is not supported by inductor
+    if compile_model and not onnx and device != "mps":
+        # The compiled module wraps the model and forwards its attributes
+        classifier.model = cast(
+            PreTrainedModel,
+            torch.compile(
+                classifier.model,
+                mode="reduce-overhead" if _is_cuda_device(device) else "default",
+                fullgraph=False,
+            ),
+        )
+    return classifier
+
+
+def _get_pipeline(
+    model: str,
+    device: Union[str, int],
+    quantize: bool = False,
+    compile_model: bool = False,
+    half_precision: bool = False,
+) -> _TopicClassificationPipeline:
+    """Returns the zero-shot pipeline for `model` on `device`, loading it only once
+    per process so that validators sharing a model also share its weights."""
+    with _PIPELINE_LOCK:
+        return _load_pipeline(model, device, quantize, compile_model, half_precision)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_openai_client(api_key: Optional[str], api_base: Optional[str]) -> OpenAI:
+    """Returns an OpenAI client per api key and base, so that its connection pool
+    is reused across LLM calls."""
+    return OpenAI(api_key=api_key, base_url=api_base)
+
+
+# Async clients by api key and base
+_AsyncOpenAIClients = Dict[Tuple[Optional[str], Optional[str]], AsyncOpenAI]
+
+# The clients shared by the LLM requests of a `validate_many` call
+_ASYNC_OPENAI_CLIENTS: "contextvars.ContextVar[Optional[_AsyncOpenAIClients]]" = (
+    contextvars.ContextVar("restricttotopic_async_openai_clients", default=None)
+)
+
+
+@contextlib.asynccontextmanager
+async def _async_openai_clients_scope() -> AsyncIterator[None]:
+    """Shares one async OpenAI client per api key and base among the requests
+    made within the scope, and closes them when it ends."""
+    clients: _AsyncOpenAIClients = {}
+    token = _ASYNC_OPENAI_CLIENTS.set(clients)
+    try:
+        yield
+    finally:
+        _ASYNC_OPENAI_CLIENTS.reset(token)
+        for client in clients.values():
+            await client.close()
+
+
+@contextlib.asynccontextmanager
+async def _async_openai_client(
+    api_key: Optional[str], api_base: Optional[str]
+) -> AsyncIterator[AsyncOpenAI]:
+    """Yields the async OpenAI client of the current clients scope, or a client
+    closed after the request outside of one. Async clients are bound to the event
+    loop they are first used in, so they are not cached per process like the
+    sync ones."""
+    clients = _ASYNC_OPENAI_CLIENTS.get()
+    if clients is None:
+        async with AsyncOpenAI(api_key=api_key, base_url=api_base) as client:
+            yield client
+        return
+
+    client = clients.get((api_key, api_base))
+    if client is None:
+        client = AsyncOpenAI(api_key=api_key, base_url=api_base)
+        clients[(api_key, api_base)] = client
+    yield client
+
+
+def _is_transient_llm_error(exception: BaseException) -> bool:
+    """Whether an LLM call should be retried on the same LLM. Other API errors and
+    timeouts move on to the next fallback LLM instead."""
+    if isinstance(exception, APITimeoutError):
+        return False
+    if isinstance(exception, (RateLimitError, APIConnectionError)):
+        return True
+    return not isinstance(exception, (APIError, TimeoutError))
+
+
+def _llm_retry_condition(is_last_llm: bool):
+    # The last LLM of the chain has nothing to fall back to, so it retries any error
+    if is_last_llm:
+        return retry_if_exception_type()
+    return retry_if_exception(_is_transient_llm_error)
+
+
+def _llm_retrying(is_last_llm: bool) -> Retrying:
+    return Retrying(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(5),
+        retry=_llm_retry_condition(is_last_llm),
+        reraise=True,
+    )
+
+
+def _llm_async_retrying(is_last_llm: bool) -> AsyncRetrying:
+    return AsyncRetrying(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(5),
+        retry=_llm_retry_condition(is_last_llm),
+        reraise=True,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except (KeyError, ValueError, OSError):
+        # Unknown model or the encoding could not be fetched, estimate instead
+        return None
+
+
+def _logit(probability: float) -> float:
+    if probability <= 0:
+        return -math.inf
+    if probability >= 1:
+        return math.inf
+    return math.log(probability / (1 - probability))
+
+
+def _topics_above(topics: List[str], scores: np.ndarray, threshold: float) -> List[str]:
+    """Returns the topics scoring above `threshold`, from the highest score."""
+    above = np.flatnonzero(scores > threshold)
+    return [topics[idx] for idx in above[np.argsort(-scores[above], kind="stable")]]
+
+
+def _parse_llm_batch_response(
+    content: str, num_texts: int
+) -> List[Optional[List[str]]]:
+    """Returns the topics of each text from the answer to a batched LLM request, or
+    None for the texts missing from it. Malformed results, such as those whose idx
+    is not an integer or whose topics are not a list, count as missing."""
+    response = orjson.loads(content)
+    results = response.get("results") if isinstance(response, dict) else None
+    if not isinstance(results, list):
+        return [None] * num_texts
+
+    topics_by_idx = {}
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        try:
+            idx = int(result["idx"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        topics_present = result.get("topics_present")
+        if isinstance(topics_present, list):
+            topics_by_idx[idx] = topics_present
+    return [topics_by_idx.get(idx) for idx in range(num_texts)]
+
+
+@dataclass
+class _LLM:
+    """An LLM of the fallback chain and the ways to call it."""
+
+    # Shown in logs, and the cache key of OpenAI models
+    name: str
+    # OpenAI model name, used to count tokens. None for custom callables
+    model: Optional[str]
+    call: Callable[[str, List[str]], Any]
+    call_async: Callable[[str, List[str]], Awaitable[Any]]
+    call_batch_async: Optional[
+        Callable[[List[str], List[str]], Awaitable[List[Optional[List[str]]]]]
+    ]
+
+
+class _LLMResponseCache:
+    """LLM responses stored in SQLite, shared by every process using the same path."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses "
+            "(key BLOB PRIMARY KEY, response BLOB NOT NULL)"
+        )
+
+    @staticmethod
+    def key(text: str, topics: List[str], llm_name: str) -> bytes:
+        return hashlib.blake2b(
+            b"\0".join(
+                [text.encode(), "\0".join(sorted(topics)).encode(), llm_name.encode()]
+            ),
+            digest_size=16,
+        ).digest()
+
+    def get(self, key: bytes) -> Any:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else orjson.loads(row[0])
+
+    def set(self, key: bytes, response: Any) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response) VALUES (?, ?)",
+                (key, orjson.dumps(response)),
+            )
+
+
+@dataclass
+class _RateLimiter:
+    """Token bucket that holds LLM requests back until they fit within the
+    provider's requests and tokens per minute limits, instead of waiting for
+    rate limit errors. A limit left as None is not enforced."""
+
+    max_requests_per_minute: Optional[float]
+    max_tokens_per_minute: Optional[float]
+    available_request_capacity: float = field(init=False)
+    available_token_capacity: float = field(init=False)
+    last_update_time: float = field(init=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.available_request_capacity = self.max_requests_per_minute or 0.0
+        self.available_token_capacity = self.max_tokens_per_minute or 0.0
+        self.last_update_time = time.monotonic()
+
+    def _consume(self, num_tokens: int) -> float:
+        """Takes the capacity for one request if available. Returns 0 on success,
+        otherwise the number of seconds until enough capacity is refilled."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.last_update_time
+            self.last_update_time = now
+
+            request_wait = token_wait = 0.0
+            if self.max_requests_per_minute is not None:
+                self.available_request_capacity = min(
+                    self.available_request_capacity
+                    + elapsed * self.max_requests_per_minute / 60,
+                    self.max_requests_per_minute,
+                )
+                request_wait = (
+                    max(0.0, 1 - self.available_request_capacity)
+                    * 60
+                    / self.max_requests_per_minute
+                )
+            if self.max_tokens_per_minute is not None:
+                self.available_token_capacity = min(
+                    self.available_token_capacity
+                    + elapsed * self.max_tokens_per_minute / 60,
+                    self.max_tokens_per_minute,
+                )
+                # A request larger than the whole bucket only waits for a full bucket
+                num_tokens = min(num_tokens, int(self.max_tokens_per_minute))
+                token_wait = (
+                    max(0.0, num_tokens - self.available_token_capacity)
+                    * 60
+                    / self.max_tokens_per_minute
+                )
+
+            if request_wait > 0 or token_wait > 0:
+                return max(request_wait, token_wait)
+            self.available_request_capacity -= 1
+            self.available_token_capacity -= num_tokens
+            return 0.0
+
+    def acquire(self, num_tokens: int) -> None:
+        wait = self._consume(num_tokens)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._consume(num_tokens)
+
+    async def acquire_async(self, num_tokens: int) -> None:
+        wait = self._consume(num_tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._consume(num_tokens)
+
+
+_RATE_LIMITERS: Dict[
+    Tuple[Optional[str], str, Optional[int], Optional[int]], _RateLimiter
+] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def _get_rate_limiter(
+    api_key: Optional[str],
+    model: str,
+    max_requests_per_minute: Optional[int],
+    max_tokens_per_minute: Optional[int],
+) -> _RateLimiter:
+    """Returns the rate limiter of an api key, model and limits. Provider limits
+    apply to the whole account, so all the validators of a process sharing a key
+    and model share one bucket. Validators asking for other limits get a bucket of
+    their own, which only holds back their requests."""
+    key = (api_key, model, max_requests_per_minute, max_tokens_per_minute)
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(key)
+        if limiter is None:
+            limiter = _RateLimiter(max_requests_per_minute, max_tokens_per_minute)
+            _RATE_LIMITERS[key] = limiter
+        return limiter
 
 
 @register_validator(
@@ -47,7 +567,7 @@ class RestrictToTopic(Validator):
     Args:
         valid_topics (List[str]): topics that the text should be about
             (one or many).
-        invalid_topics (List[str], Optional, defaults to []): topics that the
+        invalid_topics (List[str], Optional, defaults to None): topics that the
             text cannot be about.
         device (Optional[Union[str, int]], Optional, defaults to -1): Device ordinal for
             CPU/GPU supports for Zero-Shot classifier. Setting this to -1 will leverage
@@ -74,12 +594,57 @@ class RestrictToTopic(Validator):
             a number between 0 and 1.
         llm_threshold (int, Optional, defaults to 3): The threshold used to determine
         if a topic exists based on the provided llm api. Must be between 0 and 5.
+        quantize (bool, Optional, defaults to False): Whether to run an int8
+            Zero-Shot model on CPU. The model is exported to ONNX Runtime with dynamic
+            int8 quantization (requires `optimum[onnxruntime]`).
+        classifier_batch_size (int, Optional, defaults to None): The number of
+            text/topic pairs the Zero-Shot model scores in a single forward pass.
+            By default all the pairs of a validation are scored together, up to 64.
+        llm_max_requests_per_minute (int, Optional, defaults to None): The request
+            rate allowed by the LLM provider. When set, OpenAI requests are held
+            back to stay under it, and it bounds the number of concurrent LLM
+            requests issued by `validate_many`. The limit is shared by all the
+            validators of the process using the same api key, model and limits.
+        llm_max_tokens_per_minute (int, Optional, defaults to None): The token
+            rate allowed by the LLM provider. When set, OpenAI requests are held
+            back to stay under it, shared like `llm_max_requests_per_minute`.
+        llm_batch_size (int, Optional, defaults to 1): The number of texts
+            `validate_many` classifies in a single LLM request. Only applies when
+            `llm_callable` is the name of an OpenAI model. The texts of a batch
+            share one prompt, so a text can carry instructions that change the
+            topics found in the others. Only batch texts from the same trusted
+            source.
+        high_confidence_threshold (float, Optional, defaults to 0.85): When both the
+            Zero-Shot model and the LLM are enabled, the LLM is skipped if the local
+            Zero-Shot model scores a valid topic above this threshold and no invalid
+            topic is found. Texts where an invalid topic is also found still go to
+            the LLM. Must be a number between 0 and 1.
+        llm_cache_path (str, Optional, defaults to None): Path of a SQLite database
+            where LLM responses are cached, keyed by text, topics and LLM. Several
+            validators and processes may share it. Only the responses of OpenAI
+            models are cached, since custom callables have no stable name to key
+            them by. When not provided, responses are not cached.
+        llm_fallbacks (List[Union[str, Callable]], Optional, defaults to None): LLMs
+            tried in order when the previous one fails with an API error or a
+            timeout. Each one is either the name of the OpenAI model, or a callable
+            that takes a prompt and returns a response. Rate limit and connection
+            errors are first retried on the same LLM.
+        compile_model (bool, Optional, defaults to False): Whether to compile the
+            Zero-Shot model with `torch.compile`, fusing its kernels. CUDA devices
+            also capture CUDA graphs. The first validations are slower while the
+            model compiles. Ignored on `mps` and for the int8 ONNX model.
+        half_precision (bool, Optional, defaults to False): Whether to run the
+            Zero-Shot model in bfloat16 on CUDA devices, or float16 before Ampere.
+            Faster, but scores near the thresholds may differ from the full
+            precision model. Ignored on other devices.
     """
 
+    _kwargs_var: Optional[contextvars.ContextVar] = None
+
     def __init__(
         self,
         valid_topics: List[str],
-        invalid_topics: Optional[List[str]] = [],
+        invalid_topics: Optional[List[str]] = None,
         device: Optional[Union[str, int]] = -1,
         model: Optional[str] = "facebook/bart-large-mnli",
         llm_callable: Union[str, Callable, None] = None,
@@ -87,8 +652,18 @@ class RestrictToTopic(Validator):
         classifier_api_endpoint: Optional[str] = None,
         disable_llm: Optional[bool] = False,
         on_fail: Optional[Callable[..., Any]] = None,
-        zero_shot_threshold: Optional[float] = 0.5,
+        zero_shot_threshold: float = 0.5,
         llm_threshold: Optional[int] = 3,
+        quantize: Optional[bool] = False,
+        classifier_batch_size: Optional[int] = None,
+        llm_max_requests_per_minute: Optional[int] = None,
+        llm_max_tokens_per_minute: Optional[int] = None,
+        llm_batch_size: int = 1,
+        high_confidence_threshold: float = 0.85,
+        llm_cache_path: Optional[str] = None,
+        llm_fallbacks: Optional[List[Union[str, Callable]]] = None,
+        compile_model: Optional[bool] = False,
+        half_precision: Optional[bool] = False,
         **kwargs,
     ):
         super().__init__(
@@ -103,6 +678,16 @@ class RestrictToTopic(Validator):
             on_fail=on_fail,
             zero_shot_threshold=zero_shot_threshold,
             llm_threshold=llm_threshold,
+            quantize=quantize,
+            classifier_batch_size=classifier_batch_size,
+            llm_max_requests_per_minute=llm_max_requests_per_minute,
+            llm_max_tokens_per_minute=llm_max_tokens_per_minute,
+            llm_batch_size=llm_batch_size,
+            high_confidence_threshold=high_confidence_threshold,
+            llm_cache_path=llm_cache_path,
+            llm_fallbacks=llm_fallbacks,
+            compile_model=compile_model,
+            half_precision=half_precision,
             **kwargs,
         )
         self._valid_topics = valid_topics
@@ -111,12 +696,37 @@ class RestrictToTopic(Validator):
         else:
             self._invalid_topics = invalid_topics
 
+        self._valid_set = frozenset(self._valid_topics)
+        self._invalid_set = frozenset(self._invalid_topics)
+
+        # throw if valid and invalid topics are empty
+        if not self._valid_set:
+            raise ValueError(
+                "`valid_topics` must be set and contain at least one topic."
+            )
+
+        # throw if valid and invalid topics are not disjoint
+        if self._valid_set & self._invalid_set:
+            raise ValueError("A topic cannot be valid and invalid at the same time.")
+
+        self._all_topics = list(
+            dict.fromkeys(list(self._valid_topics) + list(self._invalid_topics))
+        )
+        self._all_set = self._valid_set | self._invalid_set
+
         self._device = (
             str(device).lower()
             if str(device).lower() in ["cpu", "mps"]
             else int(device)
         )
-        self._model = model
+        # The pipeline default for zero-shot classification
+        self._model = model or "facebook/bart-large-mnli"
+        self._quantize = bool(quantize)
+        self._compile_model = bool(compile_model)
+        self._half_precision = bool(half_precision)
+        self._classifier_batch_size = classifier_batch_size
+        if self._classifier_batch_size is not None and self._classifier_batch_size < 1:
+            raise ValueError("classifier_batch_size must be a positive integer")
         self._disable_classifier = disable_classifier
         self._disable_llm = disable_llm
         self._classifier_api_endpoint = classifier_api_endpoint
@@ -124,19 +734,46 @@ class RestrictToTopic(Validator):
         self._zero_shot_threshold = zero_shot_threshold
         if self._zero_shot_threshold < 0 or self._zero_shot_threshold > 1:
             raise ValueError("zero_shot_threshold must be a number between 0 and 1")
+        self._zero_shot_margin = _logit(self._zero_shot_threshold)
+
+        self._high_confidence_threshold = high_confidence_threshold
+        if self._high_confidence_threshold < 0 or self._high_confidence_threshold > 1:
+            raise ValueError(
+                "high_confidence_threshold must be a number between 0 and 1"
+            )
+        self._high_confidence_margin = _logit(self._high_confidence_threshold)
 
         self._llm_threshold = llm_threshold
         if self._llm_threshold < 0 or self._llm_threshold > 5:
             raise ValueError("llm_threshold must be a number between 0 and 5")
-        self.set_callable(llm_callable)
+
+        self._llm_max_requests_per_minute = llm_max_requests_per_minute
+        if (
+            self._llm_max_requests_per_minute is not None
+            and self._llm_max_requests_per_minute < 1
+        ):
+            raise ValueError("llm_max_requests_per_minute must be a positive integer")
+        self._llm_max_tokens_per_minute = llm_max_tokens_per_minute
+        if (
+            self._llm_max_tokens_per_minute is not None
+            and self._llm_max_tokens_per_minute < 1
+        ):
+            raise ValueError("llm_max_tokens_per_minute must be a positive integer")
+        self._llm_batch_size = llm_batch_size
+        if self._llm_batch_size < 1:
+            raise ValueError("llm_batch_size must be a positive integer")
+        self._llm_cache = (
+            _LLMResponseCache(llm_cache_path) if llm_cache_path is not None else None
+        )
+        self.set_callable(llm_callable, llm_fallbacks)
 
         if self._classifier_api_endpoint is None and self.use_local:
-            self._classifier = pipeline(
-                "zero-shot-classification",
-                model=self._model,
-                device=self._device,
-                hypothesis_template="This example has to do with topic {}.",
-                multi_label=True,
+            self._classifier = _get_pipeline(
+                self._model,
+                self._device,
+                self._quantize,
+                self._compile_model,
+                self._half_precision,
             )
         else:
             # TODO api endpoint
@@ -154,13 +791,73 @@ class RestrictToTopic(Validator):
             List[str]: The found topics
         """
         # Find topics based on zero shot model
-        zero_shot_topics = self._inference({"text": text, "valid_topics": candidate_topics, "invalid_topics": []})
+        [zero_shot_topics], [use_llm] = self._get_topics_zero_shot_ensemble(
+            [text], candidate_topics
+        )
+        if not use_llm:
+            return zero_shot_topics
 
         # Find topics based on llm
         llm_topics = self.get_topics_llm(text, candidate_topics)
 
         return list(set(zero_shot_topics + llm_topics))
 
+    def _get_topics_zero_shot_ensemble(
+        self, texts: List[str], candidate_topics: List[str]
+    ) -> Tuple[List[List[str]], List[bool]]:
+        """Runs the zero shot step of the ensemble. Returns the found topics of each
+        text and whether the llm still has to be asked about it."""
+        zero_shot_topics, confident_topics = self._get_topics_zero_shot(
+            texts, candidate_topics
+        )
+        use_llm = []
+        for topics, confident in zip(zero_shot_topics, confident_topics):
+            found_invalid = any(topic in self._invalid_set for topic in topics)
+            confident_valid = any(topic in self._valid_set for topic in confident)
+            # The llm is skipped when the zero shot model settles the text: an
+            # invalid topic fails it, a confident valid topic with no invalid one
+            # passes it. A text with both still goes to the llm
+            use_llm.append(found_invalid == confident_valid)
+        return zero_shot_topics, use_llm
+
+    def _get_topics_zero_shot(
+        self, texts: List[str], candidate_topics: List[str]
+    ) -> Tuple[List[List[str]], List[List[str]]]:
+        """Returns the topics the zero shot model finds in each text, and those above
+        the high confidence threshold."""
+        if not self.use_local:
+            # The remote endpoint only returns the topics above the threshold
+            zero_shot_topics = [
+                self._inference(
+                    {"text": text, "valid_topics": candidate_topics, "invalid_topics": []}
+                )
+                for text in texts
+            ]
+            return zero_shot_topics, [[] for _ in texts]
+
+        zero_shot_topics = []
+        confident_topics = []
+        for margins in self._get_zero_shot_margins(texts, candidate_topics):
+            zero_shot_topics.append(
+                _topics_above(candidate_topics, margins, self._zero_shot_margin)
+            )
+            confident_topics.append(
+                _topics_above(candidate_topics, margins, self._high_confidence_margin)
+            )
+        return zero_shot_topics, confident_topics
+
+    def _get_topics_zero_shot_step(
+        self, values: List[str]
+    ) -> Tuple[List[List[str]], List[bool]]:
+        """Runs the zero shot model over several values at once. Returns the found
+        topics of each value and whether the llm has to be asked about it."""
+        if self._disable_classifier:
+            return [[] for _ in values], [True] * len(values)
+        if self._disable_llm:
+            zero_shot_topics, _ = self._get_topics_zero_shot(values, self._all_topics)
+            return zero_shot_topics, [False] * len(values)
+        return self._get_topics_zero_shot_ensemble(values, self._all_topics)
+
     def get_topics_llm(self, text: str, candidate_topics: List[str]) -> List[str]:
         """Returns a list of the topics identified in the given text using an LLM
         callable
@@ -173,40 +870,78 @@ class RestrictToTopic(Validator):
             List[str]: The topics found in the input text.
         """
         llm_topics = self.call_llm(text, candidate_topics)
+        return self._filter_llm_topics(llm_topics, candidate_topics)
+
+    async def get_topics_llm_async(
+        self, text: str, candidate_topics: List[str]
+    ) -> List[str]:
+        """Async version of `get_topics_llm`.
+
+        Args:
+            text (str): The input text to classify topics.
+            candidate_topics (List[str]): The topics to identify if present in the text.
+
+        Returns:
+            List[str]: The topics found in the input text.
+        """
+        llm_topics = await self.call_llm_async(text, candidate_topics)
+        return self._filter_llm_topics(llm_topics, candidate_topics)
+
+    def _filter_llm_topics(
+        self, llm_topics: Iterable[Any], candidate_topics: List[str]
+    ) -> List[str]:
+        candidates = (
+            self._all_set
+            if candidate_topics is self._all_topics
+            else frozenset(candidate_topics)
+        )
         found_topics = []
         for llm_topic in llm_topics:
-            if llm_topic in candidate_topics:
+            # The LLM output is untrusted, it may hold lists or objects
+            if isinstance(llm_topic, str) and llm_topic in candidates:
                 found_topics.append(llm_topic)
         return found_topics
 
-    def get_client_args(self) -> str:
+    def get_client_args(self) -> Tuple[Optional[str], Optional[str]]:
         """Returns neccessary data for api calls.
 
         Returns:
-            str: api key
+            Tuple[Optional[str], Optional[str]]: api key and api base
         """
 
-        load_dotenv()
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            kwargs = {}
-            context_copy = contextvars.copy_context()
-            for key, context_var in context_copy.items():
-                if key.name == "kwargs" and isinstance(kwargs, dict):
-                    kwargs = context_var
-                    break
+        kwargs = self._get_call_kwargs()
+        api_key = os.getenv("OPENAI_API_KEY") or kwargs.get("api_key")
+        api_base = kwargs.get("api_base")
 
-            api_key = kwargs.get("api_key")
+        return api_key, api_base
 
-        return api_key
+    @classmethod
+    def _get_call_kwargs(cls) -> Dict[str, Any]:
+        """Returns the call kwargs guardrails keeps in its "kwargs" context variable."""
+        kwargs = _MISSING
+        if cls._kwargs_var is not None:
+            kwargs = cls._kwargs_var.get(_MISSING)
+        if kwargs is _MISSING:
+            # guardrails creates a new variable in the contexts where it does not
+            # find one, so the variable kept from another thread or task may be
+            # unset here. Look it up again, and keep it for the next calls
+            context = contextvars.copy_context()
+            kwargs_var = next(
+                (context_var for context_var in context if context_var.name == "kwargs"),
+                None,
+            )
+            if kwargs_var is None:
+                return {}
+            cls._kwargs_var = kwargs_var
+            kwargs = context[kwargs_var]
+
+        return kwargs if isinstance(kwargs, dict) else {}
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(5),
-        reraise=True,
-    )
     def call_llm(self, text: str, topics: List[str]) -> str:
-        """Call the LLM with the given prompt.
+        """Call the LLM with the given prompt, falling back to `llm_fallbacks` on API
+        errors and timeouts. When `llm_cache_path` is set and the LLM is an OpenAI
+        model, a response cached for the same text, topics and LLM is returned
+        instead.
 
         Expects a function that takes a string and returns a string.
         Args:
@@ -215,19 +950,211 @@ class RestrictToTopic(Validator):
         Returns:
             response (str): String representing the LLM response.
         """
-        return self._llm_callable(text, topics)
+        response = self._get_cached_llm_response(text, topics)
+        if response is None:
+            response, llm = self._call_llm(text, topics)
+            self._cache_llm_response(text, topics, llm, response)
+        return response
+
+    def _call_llm(self, text: str, topics: List[str]) -> Tuple[Any, _LLM]:
+        """Walks the fallback chain. Returns the response and the LLM that gave it."""
+        for idx, llm in enumerate(self._llms):
+            is_last_llm = idx == len(self._llms) - 1
+            rate_limiter = self._get_rate_limiter(llm)
+            try:
+                for attempt in _llm_retrying(is_last_llm):
+                    with attempt:
+                        if rate_limiter is not None:
+                            rate_limiter.acquire(
+                                self._count_llm_tokens(text, topics, llm.model)
+                            )
+                        return llm.call(text, topics), llm
+            except (APIError, TimeoutError) as e:
+                if is_last_llm:
+                    raise
+                logger.warning(
+                    "LLM %s failed (%r), falling back to %s",
+                    llm.name,
+                    e,
+                    self._llms[idx + 1].name,
+                )
+        raise ValueError("No LLM callable is set")
+
+    async def call_llm_async(self, text: str, topics: List[str]) -> str:
+        """Async version of `call_llm`.
+
+        Args:
+            text (str): The input text to classify using the LLM.
+            topics (List[str]): The list of candidate topics.
+        Returns:
+            response (str): String representing the LLM response.
+        """
+        response = self._get_cached_llm_response(text, topics)
+        if response is None:
+            response, llm = await self._call_llm_async(text, topics)
+            self._cache_llm_response(text, topics, llm, response)
+        return response
+
+    async def _call_llm_async(
+        self, text: str, topics: List[str], first_llm: int = 0
+    ) -> Tuple[Any, _LLM]:
+        """Walks the fallback chain from `first_llm`. Returns the response and the
+        LLM that gave it."""
+        for idx in range(first_llm, len(self._llms)):
+            llm = self._llms[idx]
+            is_last_llm = idx == len(self._llms) - 1
+            rate_limiter = self._get_rate_limiter(llm)
+            try:
+                async for attempt in _llm_async_retrying(is_last_llm):
+                    with attempt:
+                        if rate_limiter is not None:
+                            await rate_limiter.acquire_async(
+                                self._count_llm_tokens(text, topics, llm.model)
+                            )
+                        return await llm.call_async(text, topics), llm
+            except (APIError, TimeoutError) as e:
+                if is_last_llm:
+                    raise
+                logger.warning(
+                    "LLM %s failed (%r), falling back to %s",
+                    llm.name,
+                    e,
+                    self._llms[idx + 1].name,
+                )
+        raise ValueError("No LLM callable is set")
+
+    async def call_llm_batch_async(
+        self, texts: List[str], topics: List[str]
+    ) -> List[Any]:
+        """Classify several texts with a single LLM request. Texts with a cached
+        response are not sent, and the texts the LLM leaves out of its answer are
+        then sent on their own.
+
+        Args:
+            texts (List[str]): The input texts to classify using the LLM.
+            topics (List[str]): The list of candidate topics.
+        Returns:
+            List[Any]: The LLM response for each text.
+        """
+        responses = [self._get_cached_llm_response(text, topics) for text in texts]
+        missing = [idx for idx, response in enumerate(responses) if response is None]
+        if not missing:
+            return responses
+
+        batch_responses, next_llm = await self._call_llm_batch_async(
+            [texts[idx] for idx in missing], topics
+        )
+        for idx, response in zip(missing, batch_responses):
+            llm = self._llms[next_llm]
+            if response is None:
+                response, llm = await self._call_llm_async(
+                    texts[idx], topics, next_llm
+                )
+            responses[idx] = response
+            self._cache_llm_response(texts[idx], topics, llm, response)
+        return responses
+
+    async def _call_llm_batch_async(
+        self, texts: List[str], topics: List[str]
+    ) -> Tuple[List[Optional[List[str]]], int]:
+        """Walks the fallback chain with batch requests. Returns the topics of each
+        text, None for the texts missing from the answer, and the index of the LLM
+        to ask about those: the LLM that answered, or the first that cannot take
+        batches."""
+        for idx, llm in enumerate(self._llms):
+            if llm.call_batch_async is None:
+                return [None] * len(texts), idx
+            is_last_llm = idx == len(self._llms) - 1
+            rate_limiter = self._get_rate_limiter(llm)
+            try:
+                async for attempt in _llm_async_retrying(is_last_llm):
+                    with attempt:
+                        if rate_limiter is not None:
+                            await rate_limiter.acquire_async(
+                                self._count_llm_tokens(
+                                    "\n".join(texts), topics, llm.model
+                                )
+                            )
+                        return await llm.call_batch_async(texts, topics), idx
+            except (APIError, TimeoutError) as e:
+                if is_last_llm:
+                    raise
+                logger.warning(
+                    "LLM %s failed (%r) on a batch, falling back to %s",
+                    llm.name,
+                    e,
+                    self._llms[idx + 1].name,
+                )
+        raise ValueError("No LLM callable is set")
+
+    def _get_rate_limiter(self, llm: _LLM) -> Optional[_RateLimiter]:
+        """Returns the rate limiter of an OpenAI model, or None when no limits are
+        set. Custom callables are never throttled."""
+        if llm.model is None or (
+            self._llm_max_requests_per_minute is None
+            and self._llm_max_tokens_per_minute is None
+        ):
+            return None
+        api_key, _ = self.get_client_args()
+        return _get_rate_limiter(
+            api_key,
+            llm.model,
+            self._llm_max_requests_per_minute,
+            self._llm_max_tokens_per_minute,
+        )
+
+    def _get_cached_llm_response(self, text: str, topics: List[str]) -> Any:
+        """Returns the cached response of the first LLM of the chain, or None."""
+        llm = self._llms[0]
+        if self._llm_cache is None or llm.model is None:
+            return None
+        return self._llm_cache.get(_LLMResponseCache.key(text, topics, llm.name))
 
-    def set_callable(self, llm_callable: Union[str, Callable, None]) -> None:
+    def _cache_llm_response(
+        self, text: str, topics: List[str], llm: _LLM, response: Any
+    ) -> None:
+        # Responses are kept under the LLM that gave them, so a fallback's answer
+        # is never served for the first LLM. A custom callable has no name that
+        # identifies it across processes, so only OpenAI responses are cached
+        if self._llm_cache is None or llm.model is None:
+            return
+        self._llm_cache.set(_LLMResponseCache.key(text, topics, llm.name), response)
+
+    def _count_llm_tokens(
+        self, text: str, topics: List[str], model: Optional[str]
+    ) -> int:
+        """Estimates the tokens an LLM request for `text` and `topics` consumes."""
+        prompt = f"{text}\n{topics}"
+        encoding = _get_encoding(model) if model else None
+        if encoding is None:
+            num_tokens = len(prompt) // 4
+        else:
+            num_tokens = len(encoding.encode(prompt))
+        return num_tokens + _LLM_REQUEST_TOKEN_OVERHEAD
+
+    def set_callable(
+        self,
+        llm_callable: Union[str, Callable, None],
+        llm_fallbacks: Optional[List[Union[str, Callable]]] = None,
+    ) -> None:
         """Set the LLM callable.
 
         Args:
             llm_callable: Either the name of the OpenAI model, or a callable that takes
                 a prompt and returns a response.
+            llm_fallbacks: LLMs tried in order when the previous one fails with an
+                API error or a timeout. Each one is either the name of the OpenAI
+                model, or a callable that takes a prompt and returns a response.
         """
 
         if llm_callable is None:
             llm_callable = "gpt-4o"
 
+        self._llms = [
+            self._build_llm(llm) for llm in [llm_callable, *(llm_fallbacks or [])]
+        ]
+
+    def _build_llm(self, llm_callable: Union[str, Callable]) -> _LLM:
         if isinstance(llm_callable, str):
             if llm_callable not in ["gpt-3.5-turbo", "gpt-4", "gpt-4o"]:
                 raise ValueError(
@@ -236,16 +1163,13 @@ class RestrictToTopic(Validator):
                     "Check out ProvenanceV1 documentation for an example."
                 )
 
-            def openai_callable(text: str, topics: List[str]) -> str:
-                api_key = self.get_client_args()
-                client = OpenAI(api_key=api_key)
-                response = client.chat.completions.create(
-                    model=llm_callable,
-                    response_format={"type": "json_object"},
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"""
+            def openai_messages(
+                text: str, topics: List[str]
+            ) -> List[ChatCompletionMessageParam]:
+                return [
+                    {
+                        "role": "user",
+                        "content": f"""
                                 Given a text and a list of topics, return a valid json list of which topics are present in the text. If none, just return an empty list.
 
                                 Output Format:
@@ -262,50 +1186,113 @@ class RestrictToTopic(Validator):
 
                                 Result:
                                 ------ """,
-                        },
-                    ],
+                    },
+                ]
+
+            def openai_callable(text: str, topics: List[str]) -> str:
+                client = _get_openai_client(*self.get_client_args())
+                response = client.chat.completions.create(
+                    model=llm_callable,
+                    response_format={"type": "json_object"},
+                    messages=openai_messages(text, topics),
                 )
-                return json.loads(response.choices[0].message.content)["topics_present"]
+                return orjson.loads(response.choices[0].message.content or "")[
+                    "topics_present"
+                ]
+
+            async def openai_callable_async(text: str, topics: List[str]) -> str:
+                async with _async_openai_client(*self.get_client_args()) as client:
+                    response = await client.chat.completions.create(
+                        model=llm_callable,
+                        response_format={"type": "json_object"},
+                        messages=openai_messages(text, topics),
+                    )
+                return orjson.loads(response.choices[0].message.content or "")[
+                    "topics_present"
+                ]
+
+            def openai_batch_messages(
+                texts: List[str], topics: List[str]
+            ) -> List[ChatCompletionMessageParam]:
+                numbered_texts = "\n".join(
+                    f'{idx}. "{text}"' for idx, text in enumerate(texts)
+                )
+                return [
+                    {
+                        "role": "user",
+                        "content": f"""
+                                Given a numbered list of texts and a list of topics, return a valid json object listing, for each text, which topics are present in it. If none, use an empty list.
+
+                                Output Format:
+                                -------------
+                                "results": [{{"idx": 0, "topics_present": []}}]
+
+                                Texts:
+                                -----
+                                {numbered_texts}
+
+                                Topics:
+                                ------
+                                {topics}
 
-            self._llm_callable = openai_callable
-        elif isinstance(llm_callable, Callable):
-            self._llm_callable = llm_callable
+                                Result:
+                                ------ """,
+                    },
+                ]
+
+            async def openai_batch_callable_async(
+                texts: List[str], topics: List[str]
+            ) -> List[Optional[List[str]]]:
+                async with _async_openai_client(*self.get_client_args()) as client:
+                    response = await client.chat.completions.create(
+                        model=llm_callable,
+                        response_format={"type": "json_object"},
+                        messages=openai_batch_messages(texts, topics),
+                    )
+                return _parse_llm_batch_response(
+                    response.choices[0].message.content or "", len(texts)
+                )
+
+            return _LLM(
+                name=llm_callable,
+                model=llm_callable,
+                call=openai_callable,
+                call_async=openai_callable_async,
+                call_batch_async=openai_batch_callable_async,
+            )
+        elif callable(llm_callable):
+            custom_callable = llm_callable
+
+            async def custom_callable_async(text: str, topics: List[str]) -> str:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, custom_callable, text, topics)
+
+            return _LLM(
+                name=getattr(custom_callable, "__qualname__", repr(custom_callable)),
+                model=None,
+                call=custom_callable,
+                call_async=custom_callable_async,
+                call_batch_async=None,
+            )
         else:
             raise ValueError("llm_callable must be a string or a Callable")
 
     def validate(
-        self, value: str, metadata: Optional[Dict[str, Any]] = {}
+        self, value: str, metadata: Optional[Dict[str, Any]] = None
     ) -> ValidationResult:
         """Validates that a string contains at least one valid topic and no invalid topics.
 
         Args:
             value (str): The given string to classify
-            metadata (Optional[Dict[str, Any]], optional): _description_. Defaults to {}.
+            metadata (Optional[Dict[str, Any]], optional): _description_. Defaults to None.
 
         Raises:
-            ValueError: If a topic is invalid and valid
-            ValueError: If no valid topics are set
             ValueError: If there is no llm or zero shot classifier set
 
         Returns:
             ValidationResult: PassResult if a topic is restricted and valid,
             FailResult otherwise
         """
-        valid_topics = set(self._valid_topics)
-        invalid_topics = set(self._invalid_topics)
-        all_topics = list(set(valid_topics) | set(invalid_topics))
-
-        # throw if valid and invalid topics are empty
-        if not valid_topics:
-            raise ValueError(
-                "`valid_topics` must be set and contain at least one topic."
-            )
-
-        
-        # throw if valid and invalid topics are not disjoint
-        if bool(valid_topics.intersection(invalid_topics)):
-            raise ValueError("A topic cannot be valid and invalid at the same time.")
-
         model_input = {
             "text": value,
             "valid_topics": self._valid_topics,
@@ -314,23 +1301,140 @@ class RestrictToTopic(Validator):
         
         # Ensemble method
         if not self._disable_classifier and not self._disable_llm:
-            found_topics = self.get_topics_ensemble(value, all_topics)
+            found_topics = self.get_topics_ensemble(value, self._all_topics)
         # LLM Classifier Only
         elif self._disable_classifier and not self._disable_llm:
-            found_topics = self.get_topics_llm(value, all_topics)
+            found_topics = self.get_topics_llm(value, self._all_topics)
         # Zero Shot Classifier Only
         elif not self._disable_classifier and self._disable_llm:
             found_topics = self._inference(model_input)
         else:
             raise ValueError("Either classifier or llm must be enabled.")
-    
+
+        return self._validate_found_topics(value, found_topics)
+
+    def validate_batch(
+        self, values: List[str], metadata: Optional[Dict[str, Any]] = None
+    ) -> List[ValidationResult]:
+        """Validates several strings at once. All of them are scored by the Zero-Shot
+        model together, in as few forward passes as `classifier_batch_size` allows.
+        LLM requests are issued one at a time, see `validate_many` to issue them
+        concurrently.
+
+        Args:
+            values (List[str]): The given strings to classify
+            metadata (Optional[Dict[str, Any]], optional): _description_. Defaults to None.
+
+        Raises:
+            ValueError: If there is no llm or zero shot classifier set
+
+        Returns:
+            List[ValidationResult]: One result per value, in the same order.
+        """
+        if self._disable_classifier and self._disable_llm:
+            raise ValueError("Either classifier or llm must be enabled.")
+
+        zero_shot_topics, use_llm = self._get_topics_zero_shot_step(values)
+
+        results = []
+        for value, topics, needed in zip(values, zero_shot_topics, use_llm):
+            if needed:
+                llm_topics = self.get_topics_llm(value, self._all_topics)
+                topics = list(set(topics + llm_topics))
+            results.append(self._validate_found_topics(value, topics))
+        return results
+
+    async def validate_many(
+        self, values: List[str], metadata: Optional[Dict[str, Any]] = None
+    ) -> List[ValidationResult]:
+        """Validates several strings at once, issuing their LLM requests concurrently.
+
+        All values are scored by the Zero-Shot model together, as in
+        `validate_batch`. The number of LLM requests in flight is bounded by
+        `llm_max_requests_per_minute / 60`, or 8 without a request limit, and each
+        request classifies up to `llm_batch_size` texts.
+
+        Args:
+            values (List[str]): The given strings to classify
+            metadata (Optional[Dict[str, Any]], optional): _description_. Defaults to None.
+
+        Raises:
+            ValueError: If there is no llm or zero shot classifier set
+
+        Returns:
+            List[ValidationResult]: One result per value, in the same order.
+        """
+        if self._disable_classifier and self._disable_llm:
+            raise ValueError("Either classifier or llm must be enabled.")
+
+        semaphore = asyncio.Semaphore(
+            _DEFAULT_LLM_CONCURRENCY
+            if self._llm_max_requests_per_minute is None
+            else max(1, self._llm_max_requests_per_minute // 60)
+        )
+        loop = asyncio.get_running_loop()
+
+        zero_shot_topics, use_llm = await loop.run_in_executor(
+            None, self._get_topics_zero_shot_step, values
+        )
+
+        llm_indexes = [idx for idx, needed in enumerate(use_llm) if needed]
+        async with _async_openai_clients_scope():
+            llm_topics = await self._get_topics_llm_many(
+                [values[idx] for idx in llm_indexes], self._all_topics, semaphore
+            )
+
+        found_topics = list(zero_shot_topics)
+        for idx, topics in zip(llm_indexes, llm_topics):
+            found_topics[idx] = list(set(zero_shot_topics[idx] + topics))
+
+        return [
+            self._validate_found_topics(value, topics)
+            for value, topics in zip(values, found_topics)
+        ]
+
+    async def _get_topics_llm_many(
+        self, texts: List[str], candidate_topics: List[str], semaphore: asyncio.Semaphore
+    ) -> List[List[str]]:
+        if self._llm_batch_size > 1 and self._llms[0].call_batch_async is not None:
+            batches = [
+                texts[start : start + self._llm_batch_size]
+                for start in range(0, len(texts), self._llm_batch_size)
+            ]
+            batch_topics = await asyncio.gather(
+                *(
+                    self._get_topics_llm_batch_async(batch, candidate_topics, semaphore)
+                    for batch in batches
+                )
+            )
+            return [topics for batch in batch_topics for topics in batch]
+
+        async def get_topics(text: str) -> List[str]:
+            async with semaphore:
+                return await self.get_topics_llm_async(text, candidate_topics)
+
+        return await asyncio.gather(*(get_topics(text) for text in texts))
+
+    async def _get_topics_llm_batch_async(
+        self, texts: List[str], candidate_topics: List[str], semaphore: asyncio.Semaphore
+    ) -> List[List[str]]:
+        async with semaphore:
+            batch_topics = await self.call_llm_batch_async(texts, candidate_topics)
+        return [
+            self._filter_llm_topics(llm_topics, candidate_topics)
+            for llm_topics in batch_topics
+        ]
+
+    def _validate_found_topics(
+        self, value: str, found_topics: List[str]
+    ) -> ValidationResult:
         # Determine if valid or invalid topics were found
         invalid_topics_found = []
         valid_topics_found = []
         for topic in found_topics:
-            if topic in self._valid_topics:
+            if topic in self._valid_set:
                 valid_topics_found.append(topic)
-            elif topic in self._invalid_topics:
+            elif topic in self._invalid_set:
                 invalid_topics_found.append(topic)
 
         error_spans = []
@@ -365,14 +1469,25 @@ class RestrictToTopic(Validator):
         text = model_input["text"]
         candidate_topics = model_input["valid_topics"] + model_input["invalid_topics"]
 
-        result = self._classifier(text, candidate_topics)
-        topics = result["labels"]
-        scores = result["scores"]
-        found_topics = []
-        for topic, score in zip(topics, scores):
-            if score > self._zero_shot_threshold:
-                found_topics.append(topic)
-        return found_topics
+        [margins] = self._get_zero_shot_margins([text], candidate_topics)
+        return _topics_above(candidate_topics, margins, self._zero_shot_margin)
+
+    def _get_zero_shot_margins(
+        self, texts: List[str], candidate_topics: List[str]
+    ) -> np.ndarray:
+        """Scores each candidate topic in each text with the local zero shot model.
+        Returns the entailment margins, one row per text, which are compared to the
+        logit of the thresholds."""
+        if not texts or not candidate_topics:
+            return np.empty((len(texts), len(candidate_topics)))
+
+        num_pairs = len(texts) * len(candidate_topics)
+        return self._classifier.entailment_margins(
+            texts,
+            candidate_topics,
+            _HYPOTHESIS_TEMPLATE,
+            batch_size=self._classifier_batch_size or min(64, num_pairs),
+        )
 
     
     def _inference_remote(self, model_input: Any) -> Any: